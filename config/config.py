@@ -19,11 +19,27 @@ class Config:
     # Pinecone Configuration
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
     PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "quiz-generator")
+    USE_GRPC = os.getenv("USE_GRPC", "false").lower() == "true"  # Bulk upserts over gRPC; needs pinecone[grpc]
     
     # Application Settings
     MAX_QUIZ_COUNT = int(os.getenv("MAX_QUIZ_COUNT", 10))
     DEFAULT_CHUNK_SIZE = int(os.getenv("DEFAULT_CHUNK_SIZE", 800))
     DEFAULT_CHUNK_OVERLAP = int(os.getenv("DEFAULT_CHUNK_OVERLAP", 100))
+    MIN_CHUNK_SIZE = int(os.getenv("MIN_CHUNK_SIZE", 100))  # Smaller chunks get merged into a neighbour
+    
+    # Embedding Dimensions
+    # text-embedding-3-large is Matryoshka-trained, so truncating 3072 -> 1024 dims
+    # costs only a small retrieval-quality drop while cutting vector size, Pinecone
+    # storage and query payloads to a third. Set 3072 for full fidelity; indexes
+    # created under one setting can't accept vectors of another.
+    EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", 1024))
+    
+    # Embedding Cache (SQLite, keyed by model + text hash)
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.expanduser("~/.cache/quiz_gen/embeddings.sqlite3"))
+    
+    # Chunk Cache (pickled chunk lists keyed by file digest + chunking settings)
+    CHUNK_CACHE_DIR = os.getenv("CHUNK_CACHE_DIR", os.path.expanduser("~/.cache/quiz_gen/chunks"))
+    CHUNK_CACHE_MAX_FILES = int(os.getenv("CHUNK_CACHE_MAX_FILES", 256))  # Least recently used pruned on write
     
     # File Upload Settings
     UPLOAD_FOLDER = "uploads"
@@ -10,6 +10,7 @@ This file contains:
 
 import base64
 import asyncio
+import threading
 import aiohttp
 from typing import List, Dict
 from concurrent.futures import ThreadPoolExecutor
@@ -39,6 +40,7 @@ def get_llm(temperature: float = 0.3, model: str = "gpt-4o-mini") -> ChatOpenAI:
 
 embeddings_model = OpenAIEmbeddings(
     model="text-embedding-3-large",
+    dimensions=Config.EMBEDDING_DIMENSIONS,
     api_key=Config.OPENAI_API_KEY,
 )
 
@@ -52,8 +54,12 @@ def get_embeddings() -> OpenAIEmbeddings:
 
 VISION_MODEL = "gpt-4.1-mini"
 VISION_MAX_TOKENS = 4096
+VISION_MAX_CONCURRENT = 10  # Process-wide cap across all concurrent requests
 OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
 
+# Shared by every caller so N simultaneous requests can't fan out N x 5 calls
+_vision_slots = threading.BoundedSemaphore(VISION_MAX_CONCURRENT)
+
 
 def call_vision_api(
     base64_image: str, 
@@ -64,6 +70,8 @@ def call_vision_api(
     """
     Synchronous call to OpenAI Vision API.
     
+    Calls from all threads share a global concurrency cap (VISION_MAX_CONCURRENT).
+    
     Args:
         base64_image: Base64 encoded image
         prompt: User prompt
@@ -101,12 +109,13 @@ def call_vision_api(
         "max_tokens": VISION_MAX_TOKENS
     }
     
-    response = requests.post(
-        OPENAI_API_URL,
-        headers=headers,
-        json=payload,
-        timeout=160
-    )
+    with _vision_slots:
+        response = requests.post(
+            OPENAI_API_URL,
+            headers=headers,
+            json=payload,
+            timeout=160
+        )
     
     if response.status_code != 200:
         raise Exception(f"Vision API error: {response.text}")
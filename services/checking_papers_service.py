@@ -333,7 +333,7 @@ class CheckingPapersService:
                 
                 if images:
                     # Get first page as base64 image
-                    first_page_b64 = self.ocr_service._pil_to_base64(images[0])
+                    first_page_b64 = self.ocr_service._bytes_to_base64(images[0])
                     # Extract name and roll number using Vision AI
                     student_info = self._extract_student_info_from_image(first_page_b64)
             
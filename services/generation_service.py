@@ -9,7 +9,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from fastapi import UploadFile
 
 from llm_models.llm_models import llm
-from vectordb.vector_ops import PineconeVectorDB
+from vectordb.vector_ops import PineconeVectorDB, get_vector_db
 from vectordb.chunking import DocumentChunker
 from prompts.generation_prompts import GenerationPrompts
 from models import QuizConfig, AssignmentConfig, Quiz, Assignment, QuizQuestion, AssignmentQuestion
@@ -50,7 +50,7 @@ class GenerationService:
         
         # Create vector DB
         log_step("Creating vector database", f"Index: {self.index_name}")
-        self.vector_db = PineconeVectorDB(index_name=self.index_name)
+        self.vector_db = get_vector_db(self.index_name)
         self.vector_db.add_documents(chunks, namespace=self.namespace)
         log_success(f"Added {len(chunks)} chunks to Pinecone")
         
@@ -8,18 +8,43 @@ import base64
 import tempfile
 import shutil
 import asyncio
+import contextlib
+import copy
+from functools import lru_cache
 from typing import List, Dict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from fastapi import UploadFile
 import fitz  # PyMuPDF
-from PIL import Image
-import io
 import gdown
 
 from llm_models.llm_models import call_vision_api, process_images_parallel
 from prompts.ocr_prompts import OCRPrompts
 from utils.logger import log_step, log_success, log_error, log_debug
 
+# Precompiled patterns (Drive URL parsing and markdown fence stripping)
+_FILE_ID_RE = re.compile(r'/file/d/([a-zA-Z0-9_-]+)')
+_ID_PARAM_RE = re.compile(r'[?&]id=([a-zA-Z0-9_-]+)')
+_FENCE_LEAD = re.compile(r'^```(?:json)?\s*')
+_FENCE_TAIL = re.compile(r'\s*```$')
+
+_MATRIX_2X = fitz.Matrix(2, 2)  # 2x zoom for better quality
+
+# Only small payloads (e.g. blank-page templates) are memoized; for large ones
+# the deepcopy on a cache hit would cost more than re-parsing.
+_PARSE_CACHE_MAX_CHARS = 4096
+
+
+def _strip_fences(response: str) -> str:
+    """Remove markdown code fences around a JSON payload."""
+    response = _FENCE_LEAD.sub('', response.strip(), count=1)
+    return _FENCE_TAIL.sub('', response, count=1).strip()
+
+
+@lru_cache(maxsize=256)
+def _parse_stripped(payload: str):
+    """Parse a fence-free JSON payload (cached; callers must copy the result)."""
+    return json.loads(payload)
+
 
 class OCRService:
     """Service for extracting text from documents using GPT Vision."""
@@ -34,31 +59,24 @@ class OCRService:
         with open(image_path, "rb") as f:
             return base64.b64encode(f.read()).decode('utf-8')
     
-    def _pil_to_base64(self, pil_image: Image.Image) -> str:
-        """Convert PIL Image to base64."""
-        buffer = io.BytesIO()
-        pil_image.save(buffer, format="PNG")
-        buffer.seek(0)
-        return base64.b64encode(buffer.getvalue()).decode('utf-8')
+    def _bytes_to_base64(self, img_data: bytes) -> str:
+        """Convert already-encoded image bytes to base64."""
+        return base64.b64encode(img_data).decode('ascii')
     
     # ============== PDF PROCESSING ==============
     
-    def _pdf_to_images(self, pdf_path: str) -> List[Image.Image]:
-        """Convert PDF pages to images using PyMuPDF."""
+    def _pdf_to_images(self, pdf_path: str) -> List[bytes]:
+        """Convert PDF pages to PNG bytes using PyMuPDF."""
         log_step("Converting PDF to images", pdf_path)
         
         images = []
-        pdf = fitz.open(pdf_path)
         
-        for page_num in range(len(pdf)):
-            page = pdf[page_num]
-            mat = fitz.Matrix(2, 2)  # 2x zoom for better quality
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("png")
-            image = Image.open(io.BytesIO(img_data))
-            images.append(image)
+        with contextlib.closing(fitz.open(pdf_path)) as pdf:
+            for page in pdf.pages():
+                pix = page.get_pixmap(matrix=_MATRIX_2X)
+                images.append(pix.tobytes("png"))
+                pix = None  # Release the pixmap before rendering the next page
         
-        pdf.close()
         log_success(f"Converted {len(images)} pages")
         return images
     
@@ -66,17 +84,16 @@ class OCRService:
     
     def _parse_json(self, response: str) -> Dict:
         """Parse JSON from API response."""
-        response = response.strip()
-        if response.startswith("```json"):
-            response = response[7:]
-        elif response.startswith("```"):
-            response = response[3:]
-        if response.endswith("```"):
-            response = response[:-3]
+        payload = _strip_fences(response)
+        if not payload:
+            return {"raw_text": payload, "answers": [], "error": "JSON parse failed"}
         try:
-            return json.loads(response.strip())
+            if len(payload) > _PARSE_CACHE_MAX_CHARS:
+                return json.loads(payload)
+            # Callers mutate the result (e.g. answer['page']), so hand out a copy
+            return copy.deepcopy(_parse_stripped(payload))
         except json.JSONDecodeError:
-            return {"raw_text": response, "answers": [], "error": "JSON parse failed"}
+            return {"raw_text": payload, "answers": [], "error": "JSON parse failed"}
     
     # ============== GOOGLE DRIVE ==============
     
@@ -104,9 +121,7 @@ class OCRService:
                             downloaded_files.append(file_path)
             else:
                 # Download single file
-                match = re.search(r'/file/d/([a-zA-Z0-9_-]+)', drive_url)
-                if not match:
-                    match = re.search(r'[?&]id=([a-zA-Z0-9_-]+)', drive_url)
+                match = _FILE_ID_RE.search(drive_url) or _ID_PARAM_RE.search(drive_url)
                 
                 if match:
                     file_id = match.group(1)
@@ -125,14 +140,14 @@ class OCRService:
     
     # ============== PARALLEL PAGE PROCESSING ==============
     
-    def _process_pages_parallel(self, images: List[Image.Image]) -> List[Dict]:
+    def _process_pages_parallel(self, images: List[bytes]) -> List[Dict]:
         """Process multiple pages in parallel using ThreadPoolExecutor."""
         log_step("Processing pages in parallel", f"{len(images)} pages")
         
         def process_single_page(args):
-            idx, image = args
+            idx, img_data = args
             try:
-                base64_img = self._pil_to_base64(image)
+                base64_img = self._bytes_to_base64(img_data)
                 response = call_vision_api(
                     base64_img,
                     OCRPrompts.PAGE,
@@ -241,21 +256,34 @@ class OCRService:
     def _consolidate_answers(self, answers: List[Dict]) -> List[Dict]:
         """Consolidate answers that span multiple pages."""
         grouped = {}
+        content_parts = {}
         
         for answer in answers:
             num = str(answer.get('answer_number', 'unknown'))
             if num not in grouped:
                 grouped[num] = {
                     "answer_number": num,
-                    "content": answer.get('content', ''),
+                    "content": "",
                     "answer_type": answer.get('answer_type', 'unknown'),
                     "pages": [answer.get('page', 1)],
                     "confidence": answer.get('confidence', 'medium')
                 }
-            else:
-                grouped[num]['content'] += "\n" + answer.get('content', '')
-                if answer.get('page'):
-                    grouped[num]['pages'].append(answer.get('page'))
+                content_parts[num] = []
+            elif answer.get('page'):
+                grouped[num]['pages'].append(answer.get('page'))
+            content_parts[num].append(answer.get('content') or '')  # Vision model may return null
+        
+        # Drop repeated parts (e.g. headers OCR'd again on every page)
+        for num, parts in content_parts.items():
+            seen = set()
+            deduped = []
+            for part in parts:
+                key = part.strip()
+                if not key or key in seen:  # Skip empty (null) parts and repeats
+                    continue
+                seen.add(key)
+                deduped.append(part)
+            grouped[num]['content'] = "\n".join(deduped)
         
         return list(grouped.values())
     
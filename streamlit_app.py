@@ -3,19 +3,327 @@ Streamlit Frontend for Quiz Generator API
 """
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import io
 import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# orjson is optional; it parses the large OCR/grading payloads much faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# requests-toolbelt is optional; it streams large multipart uploads
+try:
+    from requests_toolbelt import MultipartEncoder
+except ImportError:
+    MultipartEncoder = None
 
 API_URL = "http://localhost:8004"
+CONNECT_TIMEOUT = 5  # Seconds; long read timeouts shouldn't also apply to connecting
+RESULTS_PER_PAGE = 20  # Student detail cards rendered per page
+RAW_PREVIEW_CHARS = 500  # Raw OCR text shown before "Show full raw text"
 
 st.set_page_config(page_title="Quiz Generator", page_icon="📝", layout="wide")
 
+
+@st.cache_resource
+def _api_session() -> requests.Session:
+    """Shared HTTP session so API calls reuse pooled keep-alive connections."""
+    session = requests.Session()
+    # Retry covers dropped keep-alive connections; urllib3 never retries POSTs by default
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=2, backoff_factor=0.2)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _load_json(response: requests.Response):
+    """Parse a JSON response body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+# ============== DOCUMENT FETCHERS ==============
+
+class _DownloadFailed(Exception):
+    """Raised for non-200 downloads so st.cache_data never stores them."""
+    
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def _fetch_doc_cached(endpoint: str, payload_json: str, timeout: int = 60) -> io.BytesIO:
+    """
+    POST a JSON payload to a download endpoint and return the body.
+    
+    The binary body is read in chunks into a BytesIO instead of being
+    buffered whole by requests first. Raises _DownloadFailed on non-200.
+    """
+    buffer = io.BytesIO()
+    with _api_session().post(
+        f"{API_URL}{endpoint}",
+        json=json.loads(payload_json),
+        timeout=timeout,
+        stream=True
+    ) as response:
+        if response.status_code != 200:
+            raise _DownloadFailed(response.status_code)
+        for chunk in response.iter_content(chunk_size=1 << 16):
+            buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+
+def fetch_doc(endpoint: str, payload_json: str, timeout: int = 60) -> tuple:
+    """
+    POST a JSON payload to a download endpoint. Returns (status_code, content).
+    
+    The payload is passed pre-serialized so identical results hit the cache
+    and reruns don't make the server re-render the same document. Only
+    successful downloads are cached, so a transient error is retried on
+    the next rerun; content is None for failures.
+    """
+    try:
+        return 200, _fetch_doc_cached(endpoint, payload_json, timeout)
+    except _DownloadFailed as e:
+        return e.status_code, None
+
+
+def fetch_quiz_doc(result: dict) -> tuple:
+    """Fetch the quizzes DOCX. Returns (status_code, content)."""
+    return fetch_doc("/download/quiz", json.dumps({"quizzes": result["quizzes"], "assignments": []}))
+
+
+def fetch_assign_doc(result: dict) -> tuple:
+    """Fetch the assignments DOCX. Returns (status_code, content)."""
+    return fetch_doc("/download/assignment", json.dumps({"quizzes": [], "assignments": result["assignments"]}))
+
+
+def fetch_combined_doc(result: dict) -> tuple:
+    """Fetch the combined quiz + assignment DOCX. Returns (status_code, content)."""
+    return fetch_doc(
+        "/download/combined",
+        json.dumps({"quizzes": result.get("quizzes", []), "assignments": result.get("assignments", [])})
+    )
+
+
+# ============== UPLOAD HELPERS ==============
+
+def _upload_part(uploaded_file) -> tuple:
+    """Build a (name, handle, type) multipart tuple, rewound to the start."""
+    uploaded_file.seek(0)
+    return (uploaded_file.name, uploaded_file, uploaded_file.type)
+
+
+# ============== API CALLS ==============
+
+def _post_api(endpoint: str, files=None, data=None, timeout=300, stream_upload: bool = False):
+    """
+    POST to an API endpoint and return the parsed JSON body.
+    
+    With stream_upload=True (and requests-toolbelt installed) the multipart
+    body is streamed from the file handles instead of being built in memory.
+    """
+    headers = None
+    if stream_upload and files and MultipartEncoder is not None:
+        fields = list(files) + [(k, str(v)) for k, v in (data or {}).items()]
+        encoder = MultipartEncoder(fields=fields)
+        files, data, headers = None, encoder, {"Content-Type": encoder.content_type}
+    
+    response = _api_session().post(
+        f"{API_URL}{endpoint}",
+        files=files,
+        data=data,
+        headers=headers,
+        timeout=timeout
+    )
+    return _load_json(response)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _post_api_cached(endpoint: str, cache_key: tuple, _files=None, _data=None, _timeout=300):
+    """
+    Memoized _post_api keyed by (endpoint, cache_key).
+    
+    The underscored args are excluded from hashing, so cache_key must capture
+    everything that affects the result (e.g. file digests + settings).
+    """
+    return _post_api(endpoint, _files, _data, _timeout)
+
+
+def _call_api(
+    endpoint: str,
+    *,
+    files=None,
+    data=None,
+    timeout,
+    state_key: str,
+    success_message,
+    error_field: str = "error",
+    cache_key: tuple = None,
+    stream_upload: bool = False
+):
+    """
+    POST to the API, store a successful result in session state and report
+    the outcome in the UI. Returns the parsed result, or None on failure.
+    """
+    try:
+        if cache_key is not None:
+            result = _post_api_cached(endpoint, cache_key, _files=files, _data=data, _timeout=timeout)
+        else:
+            result = _post_api(endpoint, files, data, timeout, stream_upload=stream_upload)
+    except requests.exceptions.ConnectionError:
+        st.error("Cannot connect to API. Make sure FastAPI is running on port 8004.")
+        return None
+    except Exception as e:
+        st.error(f"Error: {str(e)}")
+        return None
+    
+    if result.get("success"):
+        st.success(success_message(result))
+        st.session_state[state_key] = result
+        return result
+    
+    if cache_key is not None:
+        # Don't let a failed run stick in the cache
+        _post_api_cached.clear()
+    st.error(f"Error: {result.get(error_field, 'Unknown error')}")
+    return None
+
+
+def _ocr_success_message(result: dict) -> str:
+    return f"✅ Extracted {result.get('total_answers', 0)} answers from {result.get('total_files', 0)} files"
+
+
+def _grading_success_message(result: dict) -> str:
+    return f"✅ Graded {result.get('successful', 0)} out of {result.get('total_students', 0)} papers successfully!"
+
+
+# ============== API STATUS ==============
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _api_health() -> Optional[int]:
+    """Health-check status code, or None when the API is unreachable."""
+    try:
+        return _api_session().get(f"{API_URL}/health", timeout=2).status_code
+    except requests.exceptions.RequestException:
+        return None
+
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _list_indexes() -> dict:
+    """Index listing from the API, reused across reruns for a few seconds."""
+    return _load_json(_api_session().get(f"{API_URL}/indexes", timeout=(CONNECT_TIMEOUT, 30)))
+
+
+# ============== RESULT RENDERING ==============
+
+def _quiz_question_md(q: dict) -> str:
+    """Format a quiz question as a single markdown block (one delta per question)."""
+    parts = [
+        f"**Question:** {q['question_text']}",
+        f"**Type:** {q['question_type']} | **Marks:** {q['marks']} | **Difficulty:** {q['difficulty_level']}"
+    ]
+    if q.get("options"):
+        parts.append("**Options:**\n" + "\n".join(f"- {opt}" for opt in q["options"]))
+    parts.append(f"✅ **Correct Answer:** {q['correct_answer']}")
+    if q.get("explanation"):
+        parts.append(f"💡 **Explanation:** {q['explanation']}")
+    return "\n\n".join(parts)
+
+
+def _assignment_question_md(q: dict) -> str:
+    """Format an assignment question as a single markdown block."""
+    parts = [
+        f"**Question:** {q['question_text']}",
+        f"**Type:** {q['question_type']} | **Marks:** {q['marks']} | **Difficulty:** {q['difficulty_level']}"
+    ]
+    if q.get("expected_length"):
+        parts.append(f"📏 **Expected Length:** {q['expected_length']}")
+    if q.get("key_points"):
+        parts.append("🔑 **Key Points:**\n" + "\n".join(f"- {point}" for point in q["key_points"]))
+    return "\n\n".join(parts)
+
+
+# ============== OCR RENDERING ==============
+
+@st.fragment
+def _render_file_panel(file_data: dict):
+    """Render one OCR file's details; reruns on its own when its widgets change."""
+    filename = file_data.get('filename', 'Unknown')
+    answers = file_data.get('answers', [])
+    quiz_answers = file_data.get('quiz_answers', [])
+    raw_text = file_data.get('raw_text', '')
+    
+    if file_data.get('error'):
+        st.error(f"Error: {file_data.get('error')}")
+        return
+    
+    # RAW TEXT FIRST - so user can see what was extracted
+    if raw_text:
+        st.markdown("#### 📝 Complete Extracted Text (Raw)")
+        # Only send the (possibly large) full raw text to the browser on request
+        if st.toggle("Show full raw text", key=f"tog_{filename}"):
+            st.info("This is ALL the text extracted from the document before structuring into answers:")
+            st.text_area(
+                "Raw Text",
+                value=raw_text,
+                height=300,
+                key=f"raw_{filename}",
+                disabled=True
+            )
+        elif len(raw_text) > RAW_PREVIEW_CHARS:
+            st.text(raw_text[:RAW_PREVIEW_CHARS] + "…")
+        else:
+            st.text(raw_text)
+        st.markdown("---")
+    
+    # Structured Answers for this file
+    if answers:
+        st.markdown("#### ✅ Structured Answers")
+        for answer in answers:
+            ans_num = answer.get('answer_number', '?')
+            ans_type = answer.get('answer_type', 'unknown')
+            content = answer.get('content', 'No content')
+            confidence = answer.get('confidence', 'N/A')
+            
+            st.markdown(f"**Answer {ans_num}** ({ans_type})")
+            st.text_area(
+                f"Content",
+                value=content,
+                height=100,
+                key=f"{filename}_{ans_num}",
+                disabled=True
+            )
+            st.caption(f"Confidence: {confidence}")
+            st.markdown("---")
+    
+    # Quiz answers for this file
+    if quiz_answers:
+        st.markdown("#### 🔘 Quiz/MCQ Answers")
+        for qa in quiz_answers:
+            st.markdown(f"**Q{qa.get('question_number', '?')}:** {qa.get('answer', 'N/A')}")
+    
+    # Raw JSON for this file (a checkbox, since expanders can't be nested)
+    if st.checkbox("🔍 View Raw JSON for this file", key=f"json_{filename}"):
+        st.json(file_data)
+
+
 # Initialize session state
-if "result" not in st.session_state:
-    st.session_state["result"] = None
-if "ocr_result" not in st.session_state:
-    st.session_state["ocr_result"] = None
-if "checking_result" not in st.session_state:
-    st.session_state["checking_result"] = None
+for _key in ("result", "ocr_result", "checking_result"):
+    st.session_state.setdefault(_key, None)
 
 # Main title
 st.title("📝 Quiz & Assignment Generator")
@@ -32,74 +340,78 @@ with tab1:
     with col1:
         st.subheader("⚙️ Configuration")
         
-        # File upload
-        uploaded_files = st.file_uploader(
-            "Upload Documents (PDF, DOCX)",
-            type=["pdf", "docx", "doc"],
-            accept_multiple_files=True,
-            key="quiz_files"
-        )
-        
-        st.markdown("---")
-        st.markdown("**Quiz Settings**")
-        num_quizzes = st.number_input("Number of Quizzes", min_value=0, max_value=10, value=1)
-        mcq_count = st.number_input("MCQ Questions per Quiz", min_value=0, max_value=20, value=5)
-        fill_blanks_count = st.number_input("Fill in Blanks per Quiz", min_value=0, max_value=20, value=3)
-        true_false_count = st.number_input("True/False per Quiz", min_value=0, max_value=20, value=2)
-        quiz_difficulty = st.selectbox("Quiz Difficulty", ["easy", "medium", "hard"], index=1, key="quiz_diff")
-        
-        st.markdown("---")
-        st.markdown("**Assignment Settings**")
-        num_assignments = st.number_input("Number of Assignments", min_value=0, max_value=10, value=0)
-        assignment_questions = st.number_input("Questions per Assignment", min_value=1, max_value=20, value=5)
-        assignment_difficulty = st.selectbox("Assignment Difficulty", ["easy", "medium", "hard"], index=1, key="assign_diff")
-        
-        st.markdown("---")
-        delete_index_after = st.checkbox("Delete index after generation", value=True)
+        # Widget changes are batched until Generate is pressed
+        with st.form("quiz_cfg", clear_on_submit=False):
+            # File upload
+            uploaded_files = st.file_uploader(
+                "Upload Documents (PDF, DOCX)",
+                type=["pdf", "docx", "doc"],
+                accept_multiple_files=True,
+                key="quiz_files"
+            )
+            
+            st.markdown("---")
+            st.markdown("**Quiz Settings**")
+            num_quizzes = st.number_input("Number of Quizzes", min_value=0, max_value=10, value=1)
+            mcq_count = st.number_input("MCQ Questions per Quiz", min_value=0, max_value=20, value=5)
+            fill_blanks_count = st.number_input("Fill in Blanks per Quiz", min_value=0, max_value=20, value=3)
+            true_false_count = st.number_input("True/False per Quiz", min_value=0, max_value=20, value=2)
+            quiz_difficulty = st.selectbox("Quiz Difficulty", ["easy", "medium", "hard"], index=1, key="quiz_diff")
+            
+            st.markdown("---")
+            st.markdown("**Assignment Settings**")
+            num_assignments = st.number_input("Number of Assignments", min_value=0, max_value=10, value=0)
+            assignment_questions = st.number_input("Questions per Assignment", min_value=1, max_value=20, value=5)
+            assignment_difficulty = st.selectbox("Assignment Difficulty", ["easy", "medium", "hard"], index=1, key="assign_diff")
+            
+            st.markdown("---")
+            delete_index_after = st.checkbox("Delete index after generation", value=True)
+            reuse_cached = st.checkbox(
+                "Reuse previous result for identical files and settings",
+                value=True,
+                help="Uncheck to force a fresh generation"
+            )
+            
+            # Generate button
+            submitted = st.form_submit_button("🚀 Generate", type="primary", use_container_width=True)
         
-        # Generate button
-        if st.button("🚀 Generate", type="primary", use_container_width=True):
+        if submitted:
             if not uploaded_files:
                 st.error("Please upload at least one document.")
             else:
                 with st.spinner("Processing documents and generating content..."):
-                    try:
-                        files = [
-                            ("files", (f.name, f.getvalue(), f.type))
+                    files = [("files", _upload_part(f)) for f in uploaded_files]
+                    
+                    data = {
+                        "num_quizzes": num_quizzes,
+                        "num_assignments": num_assignments,
+                        "mcq_count": mcq_count,
+                        "fill_blanks_count": fill_blanks_count,
+                        "true_false_count": true_false_count,
+                        "quiz_difficulty": quiz_difficulty,
+                        "assignment_questions": assignment_questions,
+                        "assignment_difficulty": assignment_difficulty,
+                        "delete_index_after": delete_index_after
+                    }
+                    
+                    cache_key = None
+                    if reuse_cached:
+                        file_sigs = tuple(
+                            (f.name, hashlib.sha1(f.getbuffer()).digest())
                             for f in uploaded_files
-                        ]
-                        
-                        data = {
-                            "num_quizzes": num_quizzes,
-                            "num_assignments": num_assignments,
-                            "mcq_count": mcq_count,
-                            "fill_blanks_count": fill_blanks_count,
-                            "true_false_count": true_false_count,
-                            "quiz_difficulty": quiz_difficulty,
-                            "assignment_questions": assignment_questions,
-                            "assignment_difficulty": assignment_difficulty,
-                            "delete_index_after": delete_index_after
-                        }
-                        
-                        response = requests.post(
-                            f"{API_URL}/generate",
-                            files=files,
-                            data=data,
-                            timeout=300
                         )
-                        
-                        result = response.json()
-                        
-                        if result.get("success"):
-                            st.success(result.get("message"))
-                            st.session_state["result"] = result
-                        else:
-                            st.error(f"Error: {result.get('message')}")
-                            
-                    except requests.exceptions.ConnectionError:
-                        st.error("Cannot connect to API. Make sure FastAPI is running on port 8004.")
-                    except Exception as e:
-                        st.error(f"Error: {str(e)}")
+                        cache_key = (file_sigs, tuple(data.items()))
+                    
+                    _call_api(
+                        "/generate",
+                        files=files,
+                        data=data,
+                        timeout=300,
+                        state_key="result",
+                        success_message=lambda r: r.get("message"),
+                        error_field="message",
+                        cache_key=cache_key
+                    )
     
     with col2:
         st.subheader("📄 Results")
@@ -111,65 +423,69 @@ with tab1:
             st.markdown("**📥 Download Documents**")
             download_col1, download_col2, download_col3 = st.columns(3)
             
-            with download_col1:
-                if result.get("quizzes"):
-                    try:
-                        quiz_response = requests.post(
-                            f"{API_URL}/download/quiz",
-                            json={"quizzes": result["quizzes"], "assignments": []},
-                            timeout=60
-                        )
-                        if quiz_response.status_code == 200:
-                            st.download_button(
-                                "📥 Download Quizzes",
-                                data=quiz_response.content,
-                                file_name="quizzes.docx",
-                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                                use_container_width=True,
-                                key="dl_quiz"
-                            )
-                    except Exception as e:
-                        st.error(f"Quiz doc error: {e}")
-            
-            with download_col2:
-                if result.get("assignments"):
-                    try:
-                        assign_response = requests.post(
-                            f"{API_URL}/download/assignment",
-                            json={"quizzes": [], "assignments": result["assignments"]},
-                            timeout=60
-                        )
-                        if assign_response.status_code == 200:
-                            st.download_button(
-                                "📥 Download Assignments",
-                                data=assign_response.content,
-                                file_name="assignments.docx",
-                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                                use_container_width=True,
-                                key="dl_assign"
-                            )
-                    except Exception as e:
-                        st.error(f"Assignment doc error: {e}")
-            
-            with download_col3:
-                if result.get("quizzes") or result.get("assignments"):
-                    try:
-                        combined_response = requests.post(
-                            f"{API_URL}/download/combined",
-                            json={"quizzes": result.get("quizzes", []), "assignments": result.get("assignments", [])},
-                            timeout=60
-                        )
-                        if combined_response.status_code == 200:
-                            st.download_button(
-                                "📥 Download All",
-                                data=combined_response.content,
-                                file_name="quiz_assignment_package.docx",
-                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                                use_container_width=True,
-                                key="dl_combined"
-                            )
-                    except Exception as e:
-                        st.error(f"Combined doc error: {e}")
+            # Fetch all three documents concurrently (fetch_doc's cache makes
+            # reruns cheap), then render each button
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                quiz_future = (
+                    executor.submit(fetch_quiz_doc, result)
+                    if result.get("quizzes") else None
+                )
+                assign_future = (
+                    executor.submit(fetch_assign_doc, result)
+                    if result.get("assignments") else None
+                )
+                combined_future = (
+                    executor.submit(fetch_combined_doc, result)
+                    if result.get("quizzes") or result.get("assignments") else None
+                )
+                
+                with download_col1:
+                    if quiz_future:
+                        try:
+                            status, content = quiz_future.result()
+                            if status == 200:
+                                st.download_button(
+                                    "📥 Download Quizzes",
+                                    data=content,
+                                    file_name="quizzes.docx",
+                                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                                    use_container_width=True,
+                                    key="dl_quiz"
+                                )
+                        except Exception as e:
+                            st.error(f"Quiz doc error: {e}")
+                
+                with download_col2:
+                    if assign_future:
+                        try:
+                            status, content = assign_future.result()
+                            if status == 200:
+                                st.download_button(
+                                    "📥 Download Assignments",
+                                    data=content,
+                                    file_name="assignments.docx",
+                                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                                    use_container_width=True,
+                                    key="dl_assign"
+                                )
+                        except Exception as e:
+                            st.error(f"Assignment doc error: {e}")
+                
+                with download_col3:
+                    if combined_future:
+                        try:
+                            status, content = combined_future.result()
+                            if status == 200:
+                                st.download_button(
+                                    "📥 Download All",
+                                    data=content,
+                                    file_name="quiz_assignment_package.docx",
+                                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                                    use_container_width=True,
+                                    key="dl_combined"
+                                )
+                        except Exception as e:
+                            st.error(f"Combined doc error: {e}")
             
             st.markdown("---")
             
@@ -179,53 +495,46 @@ with tab1:
             with result_tab1:
                 quizzes = result.get("quizzes", [])
                 if quizzes:
-                    for quiz in quizzes:
-                        st.markdown(f"### Quiz {quiz['quiz_number']} (Total Marks: {quiz['total_marks']})")
-                        
-                        for q in quiz["questions"]:
-                            with st.expander(f"Q{q['question_number']}: {q['question_text'][:60]}..."):
-                                st.markdown(f"**Question:** {q['question_text']}")
-                                st.markdown(f"**Type:** {q['question_type']} | **Marks:** {q['marks']} | **Difficulty:** {q['difficulty_level']}")
-                                
-                                if q.get("options"):
-                                    st.markdown("**Options:**")
-                                    for opt in q["options"]:
-                                        st.markdown(f"- {opt}")
-                                
-                                st.markdown(f"✅ **Correct Answer:** {q['correct_answer']}")
-                                
-                                if q.get("explanation"):
-                                    st.markdown(f"💡 **Explanation:** {q['explanation']}")
-                        
-                        st.markdown("---")
+                    # Render one quiz at a time
+                    quiz_idx = 0
+                    if len(quizzes) > 1:
+                        quiz_idx = st.selectbox(
+                            "Quiz",
+                            range(len(quizzes)),
+                            format_func=lambda i: f"Quiz {quizzes[i]['quiz_number']}"
+                        )
+                    quiz = quizzes[quiz_idx]
+                    st.markdown(f"### Quiz {quiz['quiz_number']} (Total Marks: {quiz['total_marks']})")
+                    
+                    for q in quiz["questions"]:
+                        with st.expander(f"Q{q['question_number']}: {q['question_text'][:60]}..."):
+                            st.markdown(_quiz_question_md(q))
                 else:
                     st.info("No quizzes generated.")
             
             with result_tab2:
                 assignments = result.get("assignments", [])
                 if assignments:
-                    for assignment in assignments:
-                        st.markdown(f"### Assignment {assignment['assignment_number']} (Total Marks: {assignment['total_marks']})")
-                        
-                        for q in assignment["questions"]:
-                            with st.expander(f"Q{q['question_number']}: {q['question_text'][:60]}..."):
-                                st.markdown(f"**Question:** {q['question_text']}")
-                                st.markdown(f"**Type:** {q['question_type']} | **Marks:** {q['marks']} | **Difficulty:** {q['difficulty_level']}")
-                                
-                                if q.get("expected_length"):
-                                    st.markdown(f"📏 **Expected Length:** {q['expected_length']}")
-                                
-                                if q.get("key_points"):
-                                    st.markdown("🔑 **Key Points:**")
-                                    for point in q["key_points"]:
-                                        st.markdown(f"- {point}")
-                        
-                        st.markdown("---")
+                    # Render one assignment at a time
+                    assign_idx = 0
+                    if len(assignments) > 1:
+                        assign_idx = st.selectbox(
+                            "Assignment",
+                            range(len(assignments)),
+                            format_func=lambda i: f"Assignment {assignments[i]['assignment_number']}"
+                        )
+                    assignment = assignments[assign_idx]
+                    st.markdown(f"### Assignment {assignment['assignment_number']} (Total Marks: {assignment['total_marks']})")
+                    
+                    for q in assignment["questions"]:
+                        with st.expander(f"Q{q['question_number']}: {q['question_text'][:60]}..."):
+                            st.markdown(_assignment_question_md(q))
                 else:
                     st.info("No assignments generated.")
             
             with result_tab3:
-                st.json(result)
+                if st.checkbox("Show raw JSON", key="json_generation"):
+                    st.json(result)
         else:
             st.info("Upload documents and click Generate to see results here.")
 
@@ -242,70 +551,47 @@ with tab2:
         ocr_method = st.radio("Choose input method:", ["Upload Files", "Google Drive Link"])
         
         if ocr_method == "Upload Files":
-            ocr_files = st.file_uploader(
-                "Upload answer sheets (PDF, Images)",
-                type=["pdf", "png", "jpg", "jpeg", "webp"],
-                accept_multiple_files=True,
-                key="ocr_files"
-            )
+            with st.form("ocr_upload_form"):
+                ocr_files = st.file_uploader(
+                    "Upload answer sheets (PDF, Images)",
+                    type=["pdf", "png", "jpg", "jpeg", "webp"],
+                    accept_multiple_files=True,
+                    key="ocr_files"
+                )
+                
+                submitted = st.form_submit_button("🔍 Extract Answers", type="primary", use_container_width=True)
             
-            if st.button("🔍 Extract Answers", type="primary", use_container_width=True, key="ocr_upload_btn"):
+            if submitted:
                 if not ocr_files:
                     st.error("Please upload at least one file.")
                 else:
                     with st.spinner("Extracting handwritten text..."):
-                        try:
-                            files = [
-                                ("files", (f.name, f.getvalue(), f.type))
-                                for f in ocr_files
-                            ]
-                            
-                            response = requests.post(
-                                f"{API_URL}/ocr/extract",
-                                files=files,
-                                timeout=300
-                            )
-                            
-                            result = response.json()
-                            
-                            if result.get("success"):
-                                st.success(f"✅ Extracted {result.get('total_answers', 0)} answers from {result.get('total_files', 0)} files")
-                                st.session_state["ocr_result"] = result
-                            else:
-                                st.error(f"Error: {result.get('error')}")
-                                
-                        except requests.exceptions.ConnectionError:
-                            st.error("Cannot connect to API. Make sure FastAPI is running on port 8004.")
-                        except Exception as e:
-                            st.error(f"Error: {str(e)}")
+                        _call_api(
+                            "/ocr/extract",
+                            files=[("files", _upload_part(f)) for f in ocr_files],
+                            timeout=300,
+                            state_key="ocr_result",
+                            success_message=_ocr_success_message
+                        )
         
         else:  # Google Drive Link
-            drive_url = st.text_input("Enter Google Drive link:", placeholder="https://drive.google.com/drive/folders/... or /file/d/...")
+            with st.form("ocr_drive_form"):
+                drive_url = st.text_input("Enter Google Drive link:", placeholder="https://drive.google.com/drive/folders/... or /file/d/...")
+                
+                submitted = st.form_submit_button("🔍 Extract from Drive", type="primary", use_container_width=True)
             
-            if st.button("🔍 Extract from Drive", type="primary", use_container_width=True, key="ocr_drive_btn"):
+            if submitted:
                 if not drive_url:
                     st.error("Please enter a Google Drive link.")
                 else:
                     with st.spinner("Downloading and extracting text (this may take a while for folders)..."):
-                        try:
-                            response = requests.post(
-                                f"{API_URL}/ocr/extract-url",
-                                data={"drive_url": drive_url},
-                                timeout=600  # 10 minutes for large folders
-                            )
-                            
-                            result = response.json()
-                            
-                            if result.get("success"):
-                                st.success(f"✅ Extracted {result.get('total_answers', 0)} answers from {result.get('total_files', 0)} files")
-                                st.session_state["ocr_result"] = result
-                            else:
-                                st.error(f"Error: {result.get('error')}")
-                                
-                        except requests.exceptions.ConnectionError:
-                            st.error("Cannot connect to API. Make sure FastAPI is running on port 8004.")
-                        except Exception as e:
-                            st.error(f"Error: {str(e)}")
+                        _call_api(
+                            "/ocr/extract-url",
+                            data={"drive_url": drive_url},
+                            timeout=(CONNECT_TIMEOUT, 600),  # 10 minutes for large folders
+                            state_key="ocr_result",
+                            success_message=_ocr_success_message
+                        )
     
     with ocr_col2:
         st.subheader("📝 Extracted Answers")
@@ -321,15 +607,15 @@ with tab2:
                 # Download button for ZIP of Word docs - direct download
                 st.markdown("---")
                 try:
-                    zip_response = requests.post(
-                        f"{API_URL}/ocr/download",
-                        json={"files_data": files_data},
+                    zip_status, zip_content = fetch_doc(
+                        "/ocr/download",
+                        json.dumps({"files_data": files_data}),
                         timeout=120
                     )
-                    if zip_response.status_code == 200:
+                    if zip_status == 200:
                         st.download_button(
                             "📥 Download All as Word Documents (ZIP)",
-                            data=zip_response.content,
+                            data=zip_content,
                             file_name="student_answers.zip",
                             mime="application/zip",
                             use_container_width=True,
@@ -347,64 +633,17 @@ with tab2:
                 for file_data in files_data:
                     filename = file_data.get('filename', 'Unknown')
                     answers = file_data.get('answers', [])
-                    quiz_answers = file_data.get('quiz_answers', [])
-                    raw_text = file_data.get('raw_text', '')
                     pages = file_data.get('pages_processed', 0)
                     
                     with st.expander(f"📄 {filename} ({len(answers)} answers, {pages} pages)", expanded=False):
-                        
-                        if file_data.get('error'):
-                            st.error(f"Error: {file_data.get('error')}")
-                            continue
-                        
-                        # RAW TEXT FIRST - so user can see what was extracted
-                        if raw_text:
-                            st.markdown("#### 📝 Complete Extracted Text (Raw)")
-                            st.info("This is ALL the text extracted from the document before structuring into answers:")
-                            st.text_area(
-                                "Raw Text",
-                                value=raw_text,
-                                height=300,
-                                key=f"raw_{filename}",
-                                disabled=True
-                            )
-                            st.markdown("---")
-                        
-                        # Structured Answers for this file
-                        if answers:
-                            st.markdown("#### ✅ Structured Answers")
-                            for answer in answers:
-                                ans_num = answer.get('answer_number', '?')
-                                ans_type = answer.get('answer_type', 'unknown')
-                                content = answer.get('content', 'No content')
-                                confidence = answer.get('confidence', 'N/A')
-                                
-                                st.markdown(f"**Answer {ans_num}** ({ans_type})")
-                                st.text_area(
-                                    f"Content",
-                                    value=content,
-                                    height=100,
-                                    key=f"{filename}_{ans_num}",
-                                    disabled=True
-                                )
-                                st.caption(f"Confidence: {confidence}")
-                                st.markdown("---")
-                        
-                        # Quiz answers for this file
-                        if quiz_answers:
-                            st.markdown("#### 🔘 Quiz/MCQ Answers")
-                            for qa in quiz_answers:
-                                st.markdown(f"**Q{qa.get('question_number', '?')}:** {qa.get('answer', 'N/A')}")
-                        
-                        # Raw JSON for this file
-                        with st.expander("🔍 View Raw JSON for this file"):
-                            st.json(file_data)
+                        _render_file_panel(file_data)
                 
                 st.markdown("---")
                 
                 # Full raw JSON
                 with st.expander("📊 View Complete Raw JSON"):
-                    st.json(ocr_result)
+                    if st.checkbox("Show raw JSON", key="json_ocr"):
+                        st.json(ocr_result)
             else:
                 st.warning("No files data found in result")
         else:
@@ -428,6 +667,8 @@ with tab3:
             type=["pdf", "docx", "doc"],
             key="answer_key"
         )
+        # Built once and shared by both submission branches below
+        answer_key_part = _upload_part(answer_key_file) if answer_key_file else None
         
         st.markdown("---")
         
@@ -439,92 +680,61 @@ with tab3:
         )
         
         if check_method == "Upload Files":
-            student_papers = st.file_uploader(
-                "Upload Student Papers (PDF)",
-                type=["pdf"],
-                accept_multiple_files=True,
-                key="student_papers"
-            )
+            with st.form("check_upload_form"):
+                student_papers = st.file_uploader(
+                    "Upload Student Papers (PDF)",
+                    type=["pdf"],
+                    accept_multiple_files=True,
+                    key="student_papers"
+                )
+                
+                submitted = st.form_submit_button("🔍 Check Papers", type="primary", use_container_width=True)
             
-            if st.button("🔍 Check Papers", type="primary", use_container_width=True, key="check_upload_btn"):
+            if submitted:
                 if not answer_key_file:
                     st.error("Please upload an answer key file.")
                 elif not student_papers:
                     st.error("Please upload at least one student paper.")
                 else:
                     with st.spinner("Processing answer key and grading papers... This may take a few minutes."):
-                        try:
-                            # Prepare files
-                            files = [
-                                ("answer_key", (answer_key_file.name, answer_key_file.getvalue(), answer_key_file.type))
-                            ]
-                            
-                            # Add student papers
-                            for paper in student_papers:
-                                files.append(("student_papers", (paper.name, paper.getvalue(), paper.type)))
-                            
-                            # Send request
-                            response = requests.post(
-                                f"{API_URL}/check-papers/upload",
-                                files=files,
-                                timeout=600  # 10 minutes for multiple papers
-                            )
-                            
-                            result = response.json()
-                            
-                            if result.get("success"):
-                                st.success(f"✅ Graded {result.get('successful', 0)} out of {result.get('total_students', 0)} papers successfully!")
-                                st.session_state["checking_result"] = result
-                            else:
-                                st.error(f"Error: {result.get('error', 'Unknown error')}")
-                                
-                        except requests.exceptions.ConnectionError:
-                            st.error("Cannot connect to API. Make sure FastAPI is running on port 8004.")
-                        except Exception as e:
-                            st.error(f"Error: {str(e)}")
+                        # Prepare files: answer key + student papers
+                        files = [("answer_key", answer_key_part)]
+                        files += [("student_papers", _upload_part(paper)) for paper in student_papers]
+                        
+                        _call_api(
+                            "/check-papers/upload",
+                            files=files,
+                            timeout=600,  # 10 minutes for multiple papers
+                            state_key="checking_result",
+                            success_message=_grading_success_message,
+                            stream_upload=True
+                        )
         
         else:  # Google Drive
-            drive_url = st.text_input(
-                "Google Drive Link:",
-                placeholder="https://drive.google.com/drive/folders/...",
-                key="check_drive_url"
-            )
+            with st.form("check_drive_form"):
+                drive_url = st.text_input(
+                    "Google Drive Link:",
+                    placeholder="https://drive.google.com/drive/folders/...",
+                    key="check_drive_url"
+                )
+                
+                submitted = st.form_submit_button("🔍 Check Papers from Drive", type="primary", use_container_width=True)
             
-            if st.button("🔍 Check Papers from Drive", type="primary", use_container_width=True, key="check_drive_btn"):
+            if submitted:
                 if not answer_key_file:
                     st.error("Please upload an answer key file.")
                 elif not drive_url:
                     st.error("Please enter a Google Drive link.")
                 else:
                     with st.spinner("Downloading from Google Drive and grading papers... This may take a while."):
-                        try:
-                            # Prepare answer key file
-                            files = [
-                                ("answer_key", (answer_key_file.name, answer_key_file.getvalue(), answer_key_file.type))
-                            ]
-                            
-                            data = {"drive_url": drive_url}
-                            
-                            # Send request
-                            response = requests.post(
-                                f"{API_URL}/check-papers/drive",
-                                files=files,
-                                data=data,
-                                timeout=900  # 15 minutes for large folders
-                            )
-                            
-                            result = response.json()
-                            
-                            if result.get("success"):
-                                st.success(f"✅ Graded {result.get('successful', 0)} out of {result.get('total_students', 0)} papers successfully!")
-                                st.session_state["checking_result"] = result
-                            else:
-                                st.error(f"Error: {result.get('error', 'Unknown error')}")
-                                
-                        except requests.exceptions.ConnectionError:
-                            st.error("Cannot connect to API. Make sure FastAPI is running on port 8004.")
-                        except Exception as e:
-                            st.error(f"Error: {str(e)}")
+                        _call_api(
+                            "/check-papers/drive",
+                            files=[("answer_key", answer_key_part)],
+                            data={"drive_url": drive_url},
+                            timeout=(CONNECT_TIMEOUT, 900),  # 15 minutes for large folders
+                            state_key="checking_result",
+                            success_message=_grading_success_message
+                        )
     
     with check_col2:
         st.subheader("📊 Grading Results")
@@ -556,15 +766,15 @@ with tab3:
             # Download Excel button
             st.markdown("### 📥 Download Results")
             try:
-                excel_response = requests.post(
-                    f"{API_URL}/check-papers/download-excel",
-                    json={"checking_results": result},
+                excel_status, excel_content = fetch_doc(
+                    "/check-papers/download-excel",
+                    json.dumps({"checking_results": result}),
                     timeout=120
                 )
-                if excel_response.status_code == 200:
+                if excel_status == 200:
                     st.download_button(
                         "📊 Download Excel Spreadsheet",
-                        data=excel_response.content,
+                        data=excel_content,
                         file_name="grading_results.xlsx",
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                         use_container_width=True,
@@ -586,7 +796,30 @@ with tab3:
                 results = result.get('results', [])
                 
                 if results:
-                    for idx, student_result in enumerate(results, 1):
+                    # One-shot summary table for the whole class
+                    st.dataframe(
+                        [
+                            {
+                                "Student": r.get('student_name', 'Unknown'),
+                                "Roll No": r.get('roll_number', 'Unknown'),
+                                "Obtained": r.get('total_obtained', 0),
+                                "Max": r.get('total_max', 0)
+                            }
+                            for r in results
+                        ],
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                    
+                    # Only build detail cards for the current page
+                    max_page = (len(results) - 1) // RESULTS_PER_PAGE + 1
+                    page = 1
+                    if max_page > 1:
+                        page = st.number_input("Page", min_value=1, max_value=max_page, value=1, key="results_page")
+                    start = (page - 1) * RESULTS_PER_PAGE
+                    page_results = results[start:start + RESULTS_PER_PAGE]
+                    
+                    for idx, student_result in enumerate(page_results, start + 1):
                         # Student card
                         with st.expander(
                             f"👤 {student_result.get('student_name', 'Unknown')} - {student_result.get('roll_number', 'Unknown')} | "
@@ -653,7 +886,8 @@ with tab3:
                     st.warning("No results found")
             
             with result_tab2:
-                st.json(result)
+                if st.checkbox("Show raw JSON", key="json_checking"):
+                    st.json(result)
         else:
             st.info("👆 Upload answer key and student papers, then click 'Check Papers' to see results here.")
 
@@ -664,8 +898,7 @@ st.sidebar.subheader("🗂️ Index Management")
 
 if st.sidebar.button("List Indexes"):
     try:
-        response = requests.get(f"{API_URL}/indexes")
-        data = response.json()
+        data = _list_indexes()
         if data.get("success"):
             st.sidebar.write(f"Found {data.get('count', 0)} indexes:")
             for idx in data.get("indexes", []):
@@ -674,27 +907,34 @@ if st.sidebar.button("List Indexes"):
             st.sidebar.error(data.get("error"))
     except requests.exceptions.ConnectionError:
         st.sidebar.error("API not running")
+    except requests.exceptions.RequestException as e:
+        st.sidebar.error(f"Failed to list indexes: {e}")
 
 index_to_delete = st.sidebar.text_input("Index name to delete")
 if st.sidebar.button("Delete Index"):
     if index_to_delete:
         try:
-            response = requests.delete(f"{API_URL}/indexes/{index_to_delete}")
-            data = response.json()
+            response = _api_session().delete(
+                f"{API_URL}/indexes/{index_to_delete}",
+                timeout=(CONNECT_TIMEOUT, 60)
+            )
+            data = _load_json(response)
             if data.get("success"):
+                _list_indexes.clear()
                 st.sidebar.success(data.get("message"))
             else:
                 st.sidebar.error(data.get("error"))
         except requests.exceptions.ConnectionError:
             st.sidebar.error("API not running")
+        except requests.exceptions.RequestException as e:
+            st.sidebar.error(f"Failed to delete index: {e}")
 
 # Health check
 st.sidebar.markdown("---")
-try:
-    health = requests.get(f"{API_URL}/health", timeout=2)
-    if health.status_code == 200:
-        st.sidebar.success("✅ API Connected")
-    else:
-        st.sidebar.error("❌ API Error")
-except:
+health_status = _api_health()
+if health_status == 200:
+    st.sidebar.success("✅ API Connected")
+elif health_status is None:
     st.sidebar.error("❌ API Offline")
+else:
+    st.sidebar.error("❌ API Error")
@@ -1,32 +1,44 @@
 """
 Logging configuration for the application.
 """
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from datetime import datetime
 
+# Compact single-line format: one write per record
+_FORMATTER = logging.Formatter(
+    '%(asctime)s %(levelname).1s %(name)s:%(lineno)d %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S',
+    style='%'
+)
+
 def setup_logger(name: str = "quiz_generator") -> logging.Logger:
     """
-    Set up a detailed logger for the application.
+    Set up a logger for the application (idempotent across re-imports).
     """
     logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
     
-    # Clear existing handlers
-    logger.handlers = []
+    # Already configured (e.g. module re-imported by a reloader)
+    if logger.handlers:
+        return logger
     
-    # Console handler with detailed formatting
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    
+    # Console handler, driven by a background listener thread
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.DEBUG)
+    console_handler.setFormatter(_FORMATTER)
     
-    # Detailed format with timestamp, level, module, and message
-    formatter = logging.Formatter(
-        '\n%(asctime)s | %(levelname)-8s | %(name)s:%(funcName)s:%(lineno)d\n'
-        '→ %(message)s\n' + '-' * 80,
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    # Emitting threads only enqueue; stdout writes happen off the hot path
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Flush queued records on shutdown
     
     return logger
 
@@ -35,20 +47,19 @@ logger = setup_logger()
 
 def log_step(step: str, details: str = ""):
     """Log a processing step with visual separation."""
-    logger.info(f"📌 STEP: {step}\n   {details}")
+    logger.info("📌 STEP: %s\n   %s", step, details, stacklevel=2)
 
 def log_success(message: str):
     """Log a success message."""
-    logger.info(f"✅ SUCCESS: {message}")
+    logger.info("✅ SUCCESS: %s", message, stacklevel=2)
 
 def log_error(message: str, error: Exception = None):
     """Log an error message."""
     if error:
-        logger.error(f"❌ ERROR: {message}\n   Exception: {str(error)}")
+        logger.error("❌ ERROR: %s\n   Exception: %s", message, error, stacklevel=2)
     else:
-        logger.error(f"❌ ERROR: {message}")
+        logger.error("❌ ERROR: %s", message, stacklevel=2)
 
 def log_debug(message: str):
     """Log a debug message."""
-    logger.debug(f"🔍 DEBUG: {message}")
-
+    logger.debug("🔍 DEBUG: %s", message, stacklevel=2)
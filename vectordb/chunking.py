@@ -3,16 +3,34 @@ Document chunking for PDFs and Word documents using LangChain.
 
 This file handles:
 - Loading PDF and Word documents
-- Splitting documents into chunks using RecursiveCharacterTextSplitter
+- Splitting documents into chunks (Rust semantic-text-splitter, falling back
+  to LangChain's RecursiveCharacterTextSplitter)
 - Returning chunks ready for embedding
 """
 
-from typing import List
+from typing import Iterable, Iterator, List
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader
 from langchain_core.documents import Document
 from config.config import Config
 import os
+import pickle
+import multiprocessing
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from semantic_text_splitter import TextSplitter
+except ImportError:
+    TextSplitter = None
+
+
+# Loader class per supported file extension
+_LOADER_MAP = {
+    '.pdf': PyPDFLoader,
+    '.docx': Docx2txtLoader,
+    '.doc': Docx2txtLoader,
+}
 
 
 
@@ -36,38 +54,55 @@ class DocumentChunker:
         self.chunk_size = chunk_size or Config.DEFAULT_CHUNK_SIZE
         self.chunk_overlap = chunk_overlap or Config.DEFAULT_CHUNK_OVERLAP
         
-        # Initialize the text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
-        )
+        # Initialize the text splitter (Rust-backed when available)
+        if TextSplitter is not None:
+            self.text_splitter = TextSplitter(
+                capacity=self.chunk_size,
+                overlap=self.chunk_overlap,
+                trim=False
+            )
+        else:
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                length_function=len,
+                separators=["\n\n", "\n", " ", ""]
+            )
     
-    def load_document(self, file_path: str) -> List[Document]:
+    def _split_text(self, text: str) -> List[str]:
         """
-        Load a document based on its file extension.
+        Split raw text with whichever splitter backend is active.
+        
+        Args:
+            text: Text to split
+        
+        Returns:
+            List of chunk strings
+        """
+        if TextSplitter is not None:
+            return self.text_splitter.chunks(text)
+        return self.text_splitter.split_text(text)
+    
+    def load_document(self, file_path: str) -> Iterator[Document]:
+        """
+        Lazily load a document based on its file extension.
         
         Args:
             file_path: Path to the document file
         
         Returns:
-            List of LangChain Document objects
+            Iterator of LangChain Document objects (one per PDF page)
         
         Raises:
             ValueError: If file type is not supported
         """
         file_extension = os.path.splitext(file_path)[1].lower()
+        loader_cls = _LOADER_MAP.get(file_extension)
         
-        if file_extension == '.pdf':
-            loader = PyPDFLoader(file_path)
-        elif file_extension in ['.docx', '.doc']:
-            loader = Docx2txtLoader(file_path)
-        else:
+        if loader_cls is None:
             raise ValueError(f"Unsupported file type: {file_extension}")
         
-        documents = loader.load()
-        return documents
+        return loader_cls(file_path).lazy_load()
     
     def chunk_document(self, documents: List[Document]) -> List[Document]:
         """
@@ -79,34 +114,157 @@ class DocumentChunker:
         Returns:
             List of chunked Document objects
         """
-        chunks = self.text_splitter.split_documents(documents)
-        return chunks
+        return list(self._postprocess(self._split_documents(documents)))
+    
+    def _split_documents(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Split each document into chunk Documents carrying a copy of its metadata."""
+        for doc in documents:
+            for text in self._split_text(doc.page_content):
+                yield Document(page_content=text, metadata=doc.metadata.copy())
+    
+    def _postprocess(self, chunks: Iterable[Document]) -> Iterator[Document]:
+        """
+        Merge tiny fragments into their neighbours, then re-split oversize chunks.
+        
+        A chunk shorter than Config.MIN_CHUNK_SIZE is joined to the adjacent
+        chunk from the same source when the result stays within 5% of
+        chunk_size, so tail fragments don't each cost an embedding call.
+        
+        Args:
+            chunks: Chunks in document order
+        
+        Yields:
+            Post-processed Document chunks
+        """
+        max_len = int(self.chunk_size * 1.05)
+        min_len = Config.MIN_CHUNK_SIZE
+        current = None
+        
+        for chunk in chunks:
+            if (
+                current is not None
+                and chunk.metadata.get('source') == current.metadata.get('source')
+                and min(len(current.page_content), len(chunk.page_content)) < min_len
+                and len(current.page_content) + len(chunk.page_content) + 1 <= max_len
+            ):
+                current = Document(
+                    page_content=current.page_content + "\n" + chunk.page_content,
+                    metadata={**chunk.metadata, **current.metadata}
+                )
+                continue
+            
+            if current is not None:
+                yield from self._resplit(current, max_len)
+            current = chunk
+        
+        if current is not None:
+            yield from self._resplit(current, max_len)
+    
+    def _resplit(self, chunk: Document, max_len: int) -> Iterator[Document]:
+        """Split a chunk that exceeds max_len; pass others through unchanged."""
+        if len(chunk.page_content) <= max_len:
+            yield chunk
+            return
+        for text in self._split_text(chunk.page_content):
+            yield Document(page_content=text, metadata=chunk.metadata.copy())
+    
+    def _file_chunks(self, file_path: str) -> Iterator[Document]:
+        """
+        Stream a file's chunks page by page, tagged with source metadata.
+        
+        Pages are loaded lazily and split as they arrive, so the whole
+        document is never held in memory at once.
+        
+        Args:
+            file_path: Path to the document file
+        
+        Returns:
+            Iterator of chunked Document objects (chunk_index is stamped by process_file)
+        """
+        filename = os.path.basename(file_path)
+        
+        def pages():
+            for page in self.load_document(file_path):
+                page.metadata['source'] = file_path
+                page.metadata['filename'] = filename
+                yield page
+        
+        return self._postprocess(self._split_documents(pages()))
+    
+    def _cache_path(self, file_path: str) -> str:
+        """
+        Build the chunk-cache path for a file from its content digest.
+        
+        Args:
+            file_path: Path to the document file
+        
+        Returns:
+            Path of the pickled chunk list for this file and these settings
+        """
+        with open(file_path, 'rb') as f:
+            if hasattr(hashlib, 'file_digest'):
+                digest = hashlib.file_digest(f, 'sha256').hexdigest()
+            else:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        
+        backend = 'sts' if TextSplitter is not None else 'rcts'
+        name = f"{digest}-{self.chunk_size}-{self.chunk_overlap}-{Config.MIN_CHUNK_SIZE}-{backend}.pkl"
+        return os.path.join(Config.CHUNK_CACHE_DIR, name)
     
     def process_file(self, file_path: str) -> List[Document]:
         """
         Load and chunk a document file in one step.
         
+        Identical file contents are only parsed once; later calls load the
+        pickled chunks from Config.CHUNK_CACHE_DIR.
+        
         Args:
             file_path: Path to the document file
         
         Returns:
             List of chunked Document objects with metadata
         """
-        # Load the document
-        documents = self.load_document(file_path)
+        cache_path = self._cache_path(file_path)
         
-        # Add source metadata
-        for doc in documents:
-            doc.metadata['source'] = file_path
-            doc.metadata['filename'] = os.path.basename(file_path)
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    chunks = pickle.load(f)
+                # Uploads land at a fresh temp path each time
+                filename = os.path.basename(file_path)
+                for chunk in chunks:
+                    chunk.metadata['source'] = file_path
+                    chunk.metadata['filename'] = filename
+                # Bump mtime so pruning evicts least recently used entries
+                try:
+                    os.utime(cache_path)
+                except OSError:
+                    pass
+                return chunks
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
         
-        # Chunk the documents
-        chunks = self.chunk_document(documents)
+        chunks = list(self._file_chunks(file_path))
         
-        # Add chunk index to metadata
+        # Index and total are stamped together once the stream is exhausted
+        total = len(chunks)
         for idx, chunk in enumerate(chunks):
-            chunk.metadata['chunk_index'] = idx
-            chunk.metadata['total_chunks'] = len(chunks)
+            chunk.metadata.update(chunk_index=idx, total_chunks=total)
+        
+        # Write then rename so concurrent workers never read a partial file.
+        # The cache is best-effort: an unwritable cache dir must not fail chunking.
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(Config.CHUNK_CACHE_DIR, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(chunks, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+            _prune_chunk_cache()
+        except (OSError, pickle.PicklingError):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
         
         return chunks
     
@@ -121,14 +279,26 @@ class DocumentChunker:
             List of all chunked Document objects from all files
         """
         all_chunks = []
+        jobs = [(file_path, self.chunk_size, self.chunk_overlap) for file_path in file_paths]
         
-        for file_path in file_paths:
-            try:
-                chunks = self.process_file(file_path)
+        # PDF parsing is CPU-bound pure Python, so fan out across processes.
+        # Never fork: forking the threaded API process (log listener, anyio
+        # workers, gRPC) can deadlock the child. forkserver is POSIX-only.
+        if len(jobs) > 1:
+            workers = min(8, os.cpu_count() or 1, len(jobs))
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            mp_context = multiprocessing.get_context(start_method)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+                results = list(executor.map(_process_file_worker, jobs, chunksize=1))
+        else:
+            results = [_process_file_worker(job) for job in jobs]
+        
+        for file_path, (chunks, error) in zip(file_paths, results):
+            if error is None:
                 all_chunks.extend(chunks)
                 print(f"✓ Processed {file_path}: {len(chunks)} chunks")
-            except Exception as e:
-                print(f"✗ Error processing {file_path}: {str(e)}")
+            else:
+                print(f"✗ Error processing {file_path}: {error}")
         
         return all_chunks
     
@@ -155,6 +325,72 @@ class DocumentChunker:
             List of metadata dictionaries
         """
         return [chunk.metadata for chunk in chunks]
+    
+    def get_chunk_metadata_soa(self, chunks: List[Document]) -> dict:
+        """
+        Extract the common metadata fields from chunks as columns.
+        
+        Args:
+            chunks: List of Document objects
+        
+        Returns:
+            Dict mapping source, filename, chunk_index and total_chunks to
+            lists aligned with chunks (None where a field is missing)
+        """
+        sources, filenames, indexes, totals = [], [], [], []
+        for chunk in chunks:
+            metadata = chunk.metadata
+            sources.append(metadata.get('source'))
+            filenames.append(metadata.get('filename'))
+            indexes.append(metadata.get('chunk_index'))
+            totals.append(metadata.get('total_chunks'))
+        
+        return {
+            'source': sources,
+            'filename': filenames,
+            'chunk_index': indexes,
+            'total_chunks': totals,
+        }
+
+
+def _prune_chunk_cache():
+    """Delete the oldest cached chunk files beyond Config.CHUNK_CACHE_MAX_FILES."""
+    entries = []
+    with os.scandir(Config.CHUNK_CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith('.pkl'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass  # Removed by a concurrent prune
+    
+    excess = len(entries) - Config.CHUNK_CACHE_MAX_FILES
+    if excess <= 0:
+        return
+    
+    entries.sort()
+    for _, path in entries[:excess]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _process_file_worker(job: tuple) -> tuple:
+    """
+    Chunk one file in a worker process.
+    
+    Args:
+        job: (file_path, chunk_size, chunk_overlap)
+    
+    Returns:
+        (chunks, None) on success, or ([], error message) on failure
+    """
+    file_path, chunk_size, chunk_overlap = job
+    try:
+        return DocumentChunker(chunk_size, chunk_overlap).process_file(file_path), None
+    except Exception as e:
+        return [], str(e)
 
 
 # Convenience function for quick usage
@@ -0,0 +1,153 @@
+"""
+Content-hash embedding cache backed by SQLite.
+
+This file handles:
+- Wrapping an embeddings model so repeated texts are not re-embedded
+- Batch lookups of cached vectors by text hash
+- Writing newly computed vectors back to the cache
+"""
+
+import os
+import sqlite3
+import hashlib
+from contextlib import closing
+from array import array
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from config.config import Config
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+
+# SQLite's default limit on host parameters per statement is 999
+_LOOKUP_BATCH = 900
+
+# Recorded in the cache key so switching hash backends never mixes keys
+_HASH_NAME = "blake3" if blake3 is not None else "sha256"
+
+
+def hash_texts(texts: List[str]) -> List[bytes]:
+    """
+    Hash texts for cache lookups.
+
+    Uses BLAKE3 (SIMD-accelerated) when installed, otherwise OpenSSL's
+    SHA-256, which uses SHA-NI where the CPU supports it.
+
+    Args:
+        texts: Texts to hash
+
+    Returns:
+        List of 32-byte digests in input order
+    """
+    if blake3 is not None:
+        return [blake3.blake3(t.encode("utf-8")).digest() for t in texts]
+    sha256 = hashlib.sha256
+    return [sha256(t.encode("utf-8")).digest() for t in texts]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that caches document vectors in SQLite.
+
+    Vectors are keyed by (model key, hash of text), so identical chunks are
+    embedded once and re-indexing unchanged content makes no API calls.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_key: str, db_path: str = None):
+        """
+        Initialize the cache wrapper.
+
+        Args:
+            embeddings: Underlying embeddings model
+            model_key: Identifies the model/dimensions the vectors belong to
+            db_path: SQLite file path (default from Config)
+        """
+        self.embeddings = embeddings
+        self.model_key = f"{model_key}:{_HASH_NAME}"
+        self.db_path = db_path or Config.EMBEDDING_CACHE_PATH
+
+        # The cache is best-effort: an unusable path just disables it
+        try:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                    "model TEXT NOT NULL, hash BLOB NOT NULL, vec BLOB NOT NULL, "
+                    "PRIMARY KEY (model, hash))"
+                )
+        except (OSError, sqlite3.Error):
+            self.db_path = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call keeps the wrapper safe to share across threads
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _lookup(self, conn: sqlite3.Connection, hashes: List[bytes]) -> dict:
+        """Fetch cached vectors for the given hashes in as few queries as possible."""
+        found = {}
+        unique = list(set(hashes))
+        for i in range(0, len(unique), _LOOKUP_BATCH):
+            batch = unique[i:i + _LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT hash, vec FROM embedding_cache WHERE model = ? AND hash IN ({placeholders})",
+                [self.model_key, *batch]
+            )
+            for h, vec in rows:
+                found[h] = array("f", vec).tolist()
+        return found
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents, only calling the model for texts not already cached.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List of embedding vectors in input order
+        """
+        if self.db_path is None:
+            return self.embeddings.embed_documents(texts)
+
+        hashes = hash_texts(texts)
+
+        try:
+            with closing(self._connect()) as conn, conn:
+                cached = self._lookup(conn, hashes)
+        except (OSError, sqlite3.Error):
+            # A broken cache is just a miss
+            return self.embeddings.embed_documents(texts)
+
+        # Embed each distinct missing text once
+        miss = {}
+        for h, text in zip(hashes, texts):
+            if h not in cached and h not in miss:
+                miss[h] = text
+
+        if miss:
+            vectors = self.embeddings.embed_documents(list(miss.values()))
+            new_rows = dict(zip(miss.keys(), vectors))
+            try:
+                with closing(self._connect()) as conn, conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embedding_cache (model, hash, vec) VALUES (?, ?, ?)",
+                        [(self.model_key, h, array("f", v).tobytes()) for h, v in new_rows.items()]
+                    )
+            except (OSError, sqlite3.Error):
+                pass
+            cached.update(new_rows)
+
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query (not cached; queries are rarely repeated)."""
+        return self.embeddings.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries in one model call (not cached, like embed_query)."""
+        return self.embeddings.embed_documents(texts)
@@ -4,46 +4,170 @@ from langchain_pinecone import PineconeVectorStore
 from langchain_core.documents import Document   # ✅ new location
 from pinecone import Pinecone, ServerlessSpec
 
+try:
+    from pinecone.grpc import PineconeGRPC
+except ImportError:
+    PineconeGRPC = None
+
 from llm_models.llm_models import embeddings_model
+from vectordb.embedding_cache import CachedEmbeddings
 from config.config import Config
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+
+# Texts embedded per provider call, and vectors per Pinecone upsert request
+# (50/request stays under Pinecone's 2MB request limit even at 3072 dims)
+EMBED_BATCH = 512
+UPSERT_BATCH = 50
+UPSERT_POOL_THREADS = 4
+
+
+@lru_cache(maxsize=1)
+def _pinecone_client() -> Pinecone:
+    """Shared Pinecone client, built on first use so imports don't need the API key."""
+    return Pinecone(api_key=Config.PINECONE_API_KEY)
+
+
+@lru_cache(maxsize=1)
+def _grpc_client():
+    """Optional gRPC client for bulk upserts (some deploys block outbound gRPC)."""
+    if Config.USE_GRPC and PineconeGRPC is not None:
+        return PineconeGRPC(api_key=Config.PINECONE_API_KEY)
+    return None
 
 
 class PineconeVectorDB:
     
+    # Known index name -> dimension, per API key; saves a list_indexes call per instance
+    _existing_indexes = {}
+    
     def __init__(self, index_name: str = None):
         self.index_name = index_name or Config.PINECONE_INDEX_NAME
-        self.embeddings = embeddings_model
-        self.pc = Pinecone(api_key=Config.PINECONE_API_KEY)
+        self.embeddings = CachedEmbeddings(
+            embeddings_model,
+            model_key=f"{embeddings_model.model}:{Config.EMBEDDING_DIMENSIONS}"
+        )
+        self.pc = _pinecone_client()
+        self._grpc_index = None
         self._ensure_index_exists()
         self.vector_store = PineconeVectorStore(
-            index_name=self.index_name,
+            index=self.pc.Index(self.index_name),
             embedding=self.embeddings
         )
     
     def _ensure_index_exists(self):
-        existing_indexes = [index.name for index in self.pc.list_indexes()]
+        existing_indexes = PineconeVectorDB._existing_indexes.get(Config.PINECONE_API_KEY)
+        
+        # Refresh on a miss, in case the index was created elsewhere
+        if existing_indexes is None or self.index_name not in existing_indexes:
+            existing_indexes = {index.name: index.dimension for index in self.pc.list_indexes()}
+            PineconeVectorDB._existing_indexes[Config.PINECONE_API_KEY] = existing_indexes
         
         if self.index_name not in existing_indexes:
             self.pc.create_index(
                 name=self.index_name,
-                dimension=3072,
+                dimension=Config.EMBEDDING_DIMENSIONS,
                 metric="cosine",
                 spec=ServerlessSpec(cloud="aws", region="us-east-1")
             )
+            delay = 0.25
             while not self.pc.describe_index(self.index_name).status['ready']:
-                time.sleep(1)
+                time.sleep(delay)
+                delay = min(delay * 2, 4.0)
+            existing_indexes[self.index_name] = Config.EMBEDDING_DIMENSIONS
+        
+        # Fail fast instead of with a Pinecone 400 part-way through ingest
+        dimension = existing_indexes[self.index_name]
+        if dimension != Config.EMBEDDING_DIMENSIONS:
+            raise ValueError(
+                f"Pinecone index '{self.index_name}' has dimension {dimension}, but "
+                f"EMBEDDING_DIMENSIONS is {Config.EMBEDDING_DIMENSIONS}. Use a new index "
+                f"name or set EMBEDDING_DIMENSIONS={dimension}."
+            )
+    
+    @staticmethod
+    def _forget_index(index_name: str):
+        PineconeVectorDB._existing_indexes.get(Config.PINECONE_API_KEY, {}).pop(index_name, None)
     
     def add_documents(self, documents: List[Document], namespace: str = "") -> List[str]:
-        ids = self.vector_store.add_documents(documents=documents, namespace=namespace)
+        grpc_client = _grpc_client()
+        if grpc_client is not None:
+            # One gRPC channel per instance (instances are shared via get_vector_db)
+            if self._grpc_index is None:
+                self._grpc_index = grpc_client.Index(self.index_name)
+            index = self._grpc_index
+        else:
+            index = self.pc.Index(self.index_name, pool_threads=UPSERT_POOL_THREADS)
+        try:
+            ids = []
+            pending = []
+            
+            for start in range(0, len(documents), EMBED_BATCH):
+                batch = documents[start:start + EMBED_BATCH]
+                vectors = self.embeddings.embed_documents([doc.page_content for doc in batch])
+            
+                records = []
+                for doc, vector in zip(batch, vectors):
+                    doc_id = str(uuid.uuid4())
+                    ids.append(doc_id)
+                    # Same "text" metadata key PineconeVectorStore reads back on search
+                    records.append((doc_id, vector, {**doc.metadata, "text": doc.page_content}))
+            
+                # Upserts run in the background while the next batch is embedded
+                for i in range(0, len(records), UPSERT_BATCH):
+                    pending.append(index.upsert(
+                        vectors=records[i:i + UPSERT_BATCH],
+                        namespace=namespace,
+                        async_req=True
+                    ))
+            
+            # gRPC returns futures (.result()), REST returns ApplyResult (.get())
+            for result in pending:
+                if hasattr(result, "result"):
+                    result.result()
+                else:
+                    result.get()
+        finally:
+            # A per-call REST Index owns a thread pool; the gRPC index is reused
+            if index is not self._grpc_index:
+                index.close()
+        
         return ids
     
     def similarity_search(self, query: str, k: int = 5, namespace: str = "", filter: Optional[dict] = None) -> List[Document]:
         return self.vector_store.similarity_search(query=query, k=k, namespace=namespace, filter=filter)
     
+    def similarity_search_batch(self, queries: List[str], k: int = 5, namespace: str = "", filter: Optional[dict] = None) -> List[List[Document]]:
+        # One embedding call for all queries, then concurrent index queries
+        vectors = self.embeddings.embed_queries(queries)
+        index = self.pc.Index(self.index_name)
+        
+        with ThreadPoolExecutor(max_workers=min(8, len(vectors) or 1)) as executor:
+            futures = [
+                executor.submit(index.query, vector=vector, top_k=k, namespace=namespace, filter=filter, include_metadata=True)
+                for vector in vectors
+            ]
+            responses = [future.result() for future in futures]
+        
+        results = []
+        for response in responses:
+            docs = []
+            for match in response.matches:
+                metadata = dict(match.metadata or {})
+                docs.append(Document(page_content=metadata.pop("text", ""), metadata=metadata))
+            results.append(docs)
+        return results
+    
     def delete_index(self):
+        if self._grpc_index is not None:
+            self._grpc_index.close()
+            self._grpc_index = None
         self.pc.delete_index(self.index_name)
+        self._forget_index(self.index_name)
+        get_vector_db.cache_clear()
     
     def get_index_stats(self) -> dict:
         index = self.pc.Index(self.index_name)
@@ -51,9 +175,8 @@ class PineconeVectorDB:
     
     @staticmethod
     def list_all_indexes() -> List[dict]:
-        pc = Pinecone(api_key=Config.PINECONE_API_KEY)
         indexes = []
-        for index in pc.list_indexes():
+        for index in _pinecone_client().list_indexes():
             indexes.append({
                 "name": index.name,
                 "dimension": index.dimension,
@@ -64,9 +187,16 @@ class PineconeVectorDB:
     
     @staticmethod
     def delete_index_by_name(index_name: str):
-        pc = Pinecone(api_key=Config.PINECONE_API_KEY)
-        pc.delete_index(index_name)
+        _pinecone_client().delete_index(index_name)
+        PineconeVectorDB._forget_index(index_name)
+        get_vector_db.cache_clear()
     
     @staticmethod
     def generate_unique_index_name() -> str:
         return f"quiz-{uuid.uuid4().hex[:8]}"
+
+
+@lru_cache(maxsize=32)
+def get_vector_db(index_name: str = None) -> PineconeVectorDB:
+    """Return a shared PineconeVectorDB per index name."""
+    return PineconeVectorDB(index_name=index_name)